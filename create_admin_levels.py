@@ -17,11 +17,17 @@ The script:
 4. Creates an ALL levels shapefile with admLevel field for filtering
 
 Requirements:
-    - geopandas
+    - Python >= 3.9
+    - geopandas >= 1.0
     - pandas
+    - numpy
+    - shapely >= 2.0 (coverage union)
+    - pyogrio >= 0.7 (vectorized GDAL I/O engine)
+    - pyarrow >= 8 (Arrow-based bulk reading of attribute columns)
     - zipfile (standard library)
     - tempfile (standard library)
     - pathlib (standard library)
+    - concurrent.futures (standard library)
 
 Usage:
     python create_admin_levels.py
@@ -35,129 +41,203 @@ Output:
 """
 
 import geopandas as gpd
+import numpy as np
 import pandas as pd
+import shapely
 import zipfile
 import tempfile
 import os
 import shutil
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-def main():
+# pyogrio reads shapefiles in bulk through GDAL instead of looping over
+# features in Python (as Fiona does), and pyarrow backs its Arrow read path,
+# so fail early with a clear message if either is missing
+try:
+    import pyogrio  # noqa: F401
+    import pyarrow  # noqa: F401
+except ImportError as e:
+    raise ImportError(
+        "pyogrio and pyarrow are required to read and write shapefiles: pip install pyogrio pyarrow"
+    ) from e
+
+def union_coverage(geoms):
+    """
+    Union admin polygons, using the fast coverage union when the input allows it.
+    
+    coverage_union_all assumes a clean polygonal coverage (shared edges noded
+    identically, no overlaps). Boundary files often contain slivers that break
+    this: mis-noded edges raise a GEOSException and overlaps produce an invalid
+    MultiPolygon. In either case fall back to the general union_all overlay.
+    
+    Args:
+        geoms: Array of shapely polygons
+    
+    Returns:
+        A single shapely geometry covering all input polygons
+    """
+    try:
+        merged = shapely.coverage_union_all(geoms)
+    except shapely.errors.GEOSException:
+        return shapely.union_all(geoms)
+    if not shapely.is_valid(merged):
+        return shapely.union_all(geoms)
+    return merged
+
+def build_admin_levels(input_zip, output_zip):
     """
-    Main function to process shapefiles and create admin levels.
+    Build the four admin level shapefiles from an admin 2 shapefile and zip them.
     
     Process:
-    1. Extract the original admin 2 shapefile from the input zip
-    2. Read the shapefile using GeoPandas
-    3. Reproject from EPSG:3395 (projected, meters) to EPSG:4326 (geographic, degrees)
-    4. Create admin 0 by dissolving all polygons into one national boundary
-    5. Create admin 1 by dissolving polygons grouped by region code (includes Admin 0 fields)
-    6. Create admin 2 by filtering columns from the original data (includes Admin 0 + Admin 1 fields)
-    7. Create ALL levels shapefile by combining all admin levels with admLevel field
-    8. Save all four shapefiles with consistent naming
-    9. Package everything into a new zip file with geographic coordinates
+    1. Read the original admin 2 shapefile directly from the input zip using GeoPandas
+    2. Create admin 1 by merging polygons grouped by region code (includes Admin 0 fields)
+    3. Create admin 0 by merging the admin 1 polygons into one national boundary
+    4. Create admin 2 by filtering columns from the original data (includes Admin 0 + Admin 1 fields)
+    5. Reproject each admin level from EPSG:3395 (projected, meters) to EPSG:4326 (geographic, degrees)
+    6. Create ALL levels shapefile by combining all admin levels with admLevel field
+    7. Save all four shapefiles with consistent naming
+    8. Package everything into a new zip file with geographic coordinates
+    
+    Args:
+        input_zip: Zip file containing SHP_ADM2_UPDATE/mdg_bnd_adm2_dis_pam.shp
+        output_zip: Zip file to write the mdg_adm0/1/2/ALL shapefiles to
     """
-    # Input and output paths
-    input_zip = "SHP_ADM2_UPDATE_dante.zip"
-    output_zip = "SHP_ADM2_UPDATE.zip"
+    # Fields of each admin level; lower levels also carry the fields of every
+    # level above them (hierarchical field structure)
+    adm0_cols = ['ADM0_PCODE', 'ADM0_EN']
+    adm1_cols = adm0_cols + ['ADM1_PCODE', 'ADM1_EN', 'ADM1_TYPE']
+    adm2_cols = adm1_cols + ['ADM2_PCODE', 'ADM2_EN', 'ADM2_TYPE']
     
-    # Create temporary directory for processing
+    # Create temporary directory for staging the output shapefiles
     with tempfile.TemporaryDirectory() as temp_dir:
         temp_path = Path(temp_dir)
         
-        print("Extracting shapefile from zip...")
-        # Extract the shapefile from zip
-        with zipfile.ZipFile(input_zip, 'r') as zip_ref:
-            zip_ref.extractall(temp_path)
-        
-        # Read the admin 2 shapefile
-        shapefile_path = temp_path / "SHP_ADM2_UPDATE" / "mdg_bnd_adm2_dis_pam.shp"
+        # Read the admin 2 shapefile straight out of the zip through GDAL's
+        # /vsizip/ virtual file system instead of extracting it to disk first
+        shapefile_path = f"/vsizip/{input_zip}/SHP_ADM2_UPDATE/mdg_bnd_adm2_dis_pam.shp"
         print(f"Reading shapefile: {shapefile_path}")
-        gdf = gpd.read_file(shapefile_path)
+        # Use the pyogrio engine with Arrow so attribute columns are decoded in bulk,
+        # and only read the attribute columns used by the admin levels
+        gdf = gpd.read_file(
+            shapefile_path,
+            engine="pyogrio",
+            use_arrow=True,
+            columns=['ADM0_PCODE', 'ADM0_EN', 'ADM1_PCODE', 'ADM1_EN', 'ADM1_TYPE', 'ADM2_PCODE', 'ADM2_EN', 'ADM2_TYPE'],
+        )
         
         print(f"Original shapefile has {len(gdf)} features")
         print(f"Columns: {list(gdf.columns)}")
         print(f"Original CRS: {gdf.crs}")
         
-        # Reproject from projected coordinate system to geographic coordinate system
-        # Input: EPSG:3395 (WGS 84 / World Mercator - projected, units in meters)
-        # Output: EPSG:4326 (WGS 84 - geographic, units in degrees)
-        # This conversion is required for Python maproom applications which expect
-        # geographic coordinates in degrees (lat/lon) rather than projected meters
-        print(f"\nReprojecting from {gdf.crs} to EPSG:4326 (WGS 84 - geographic)...")
-        gdf = gdf.to_crs('EPSG:4326')
-        print(f"Reprojected CRS: {gdf.crs}")
-        print("Coordinates are now in degrees (longitude, latitude)")
-        
-        # Create admin 0 (National) - dissolve by ADM0_PCODE
-        # This merges all 120 district polygons into 1 national boundary
-        print("\nCreating Admin 0 (National) shapefile...")
-        adm0 = gdf.dissolve(by='ADM0_PCODE', aggfunc='first')
-        # Reset index to make ADM0_PCODE a column again, then select fields
-        adm0 = adm0.reset_index()
-        adm0 = adm0[['ADM0_PCODE', 'ADM0_EN', 'geometry']]
-        print(f"Admin 0 has {len(adm0)} feature(s)")
-        
-        # Create admin 1 (Regional) - dissolve by ADM1_PCODE
+        # Create admin 1 (Regional) - union district polygons grouped by ADM1_PCODE
         # This merges district polygons that share the same region code
-        # Include hierarchical fields (Admin 0 + Admin 1 fields)
         print("\nCreating Admin 1 (Regional) shapefile...")
-        adm1 = gdf.dissolve(by='ADM1_PCODE', aggfunc='first')
-        # Reset index to make ADM1_PCODE a column again, then select fields
-        adm1 = adm1.reset_index()
-        adm1 = adm1[['ADM0_PCODE', 'ADM0_EN', 'ADM1_PCODE', 'ADM1_EN', 'ADM1_TYPE', 'geometry']]
+        # Group districts by region code directly on the arrays instead of going
+        # through pandas groupby; factorize keeps regions in input order. The
+        # region codes are hashed once here and all grouping below runs on the
+        # integer codes, so no categorical conversion of ADM1_PCODE is needed
+        adm1_codes, adm1_keys = pd.factorize(gdf['ADM1_PCODE'].values)
+        district_geoms = gdf.geometry.values
+        adm1_geoms = np.empty(len(adm1_keys), dtype=object)
+        for i in range(len(adm1_keys)):
+            members = district_geoms[adm1_codes == i]
+            # A region with a single district needs no union - reuse its geometry
+            if len(members) == 1:
+                adm1_geoms[i] = members[0]
+            else:
+                adm1_geoms[i] = union_coverage(members)
+        # Take the first non-null value of each attribute per region, grouping on
+        # the integer codes (in factorized order) and skipping rows without a code
+        adm1_mask = adm1_codes >= 0
+        adm1 = gdf.loc[adm1_mask, adm1_cols].groupby(adm1_codes[adm1_mask]).first()
+        adm1 = gpd.GeoDataFrame(adm1.reset_index(drop=True), geometry=adm1_geoms, crs=gdf.crs)
         print(f"Admin 1 has {len(adm1)} feature(s)")
         
+        # Create admin 0 (National) - union the Admin 1 polygons
+        # Admin 0 is the union of all regions, so it is built from the already
+        # merged Admin 1 polygons rather than from all 120 districts again.
+        # Region boundaries form a polygonal coverage (shared edges, no overlaps),
+        # so a coverage union is used instead of the general overlay in dissolve
+        print("\nCreating Admin 0 (National) shapefile...")
+        adm0_parts = np.asarray(adm1.geometry.values)
+        # Districts without an ADM1_PCODE belong to no region but are still part
+        # of the country, so add them to the national boundary directly
+        unassigned = np.asarray(district_geoms[adm1_codes < 0])
+        if len(unassigned):
+            print(f"{len(unassigned)} district(s) have no ADM1_PCODE; adding them to Admin 0 only")
+            adm0_parts = np.concatenate([adm0_parts, unassigned])
+        adm0_geom = union_coverage(adm0_parts)
+        # First non-null value of each Admin 0 attribute, as dissolve's 'first' did
+        adm0 = gdf[adm0_cols].bfill().iloc[:1].reset_index(drop=True)
+        adm0 = gpd.GeoDataFrame(adm0, geometry=[adm0_geom], crs=gdf.crs)
+        print(f"Admin 0 has {len(adm0)} feature(s)")
+        
         # Create admin 2 (District) - keep original geometries but filter columns
         # This preserves all 120 district boundaries
-        # Include hierarchical fields (Admin 0 + Admin 1 + Admin 2 fields)
+        # The column selection is only read and written, so no copy is made
         print("\nCreating Admin 2 (District) shapefile...")
-        adm2 = gdf[['ADM0_PCODE', 'ADM0_EN', 'ADM1_PCODE', 'ADM1_EN', 'ADM1_TYPE', 'ADM2_PCODE', 'ADM2_EN', 'ADM2_TYPE', 'geometry']].copy()
+        adm2 = gdf[adm2_cols + ['geometry']]
         print(f"Admin 2 has {len(adm2)} feature(s)")
         
+        # Reproject from projected coordinate system to geographic coordinate system
+        # Input: EPSG:3395 (WGS 84 / World Mercator - projected, units in meters)
+        # Output: EPSG:4326 (WGS 84 - geographic, units in degrees)
+        # This conversion is required for Python maproom applications which expect
+        # geographic coordinates in degrees (lat/lon) rather than projected meters.
+        # It runs after the unions so the interior district edges removed by the
+        # merge are never transformed
+        print(f"\nReprojecting from {gdf.crs} to EPSG:4326 (WGS 84 - geographic)...")
+        adm0 = adm0.to_crs('EPSG:4326')
+        adm1 = adm1.to_crs('EPSG:4326')
+        adm2 = adm2.to_crs('EPSG:4326')
+        print(f"Reprojected CRS: {adm2.crs}")
+        print("Coordinates are now in degrees (longitude, latitude)")
+        
         # Create ALL levels shapefile - combine all admin levels with admLevel field
         # This creates a single shapefile containing all administrative levels,
         # distinguished by the admLevel field (0=National, 1=Regional, 2=District)
         # This format matches the structure used in reference datasets (e.g., Djibouti)
         print("\nCreating ALL levels shapefile...")
-        # Add admLevel field to each dataframe to distinguish admin levels
-        adm0_all = adm0.copy()
-        adm0_all['admLevel'] = 0  # National level
-        
-        adm1_all = adm1.copy()
-        adm1_all['admLevel'] = 1  # Regional level
+        # Concatenate the three levels once and add the admLevel field afterwards,
+        # rather than copying each frame just to set a single scalar column
+        all_levels = pd.concat([adm0, adm1, adm2], ignore_index=True)
+        # admLevel distinguishes admin levels (0=National, 1=Regional, 2=District);
+        # int8 is enough for three levels. It follows the Admin 0 fields as before
+        all_levels.insert(len(adm0_cols), 'admLevel', np.repeat(np.array([0, 1, 2], dtype=np.int8), [len(adm0), len(adm1), len(adm2)]))
+        all_levels = gpd.GeoDataFrame(all_levels, geometry='geometry', crs=adm0.crs)
+        print(f"ALL levels has {len(all_levels)} feature(s) (1 National + {len(adm1)} Regional + {len(adm2)} District)")
         
-        adm2_all = adm2.copy()
-        adm2_all['admLevel'] = 2  # District level
-        
-        # Combine all levels into a single GeoDataFrame
-        all_levels = gpd.GeoDataFrame(pd.concat([adm0_all, adm1_all, adm2_all], ignore_index=True))
-        print(f"ALL levels has {len(all_levels)} feature(s) (1 National + {len(adm1_all)} Regional + {len(adm2_all)} District)")
+        layers = [('mdg_adm0', adm0), ('mdg_adm1', adm1), ('mdg_adm2', adm2), ('mdg_adm_ALL', all_levels)]
         
         # Save shapefiles to temporary directory
         print("\nSaving shapefiles...")
-        adm0_path = temp_path / "mdg_adm0.shp"
-        adm1_path = temp_path / "mdg_adm1.shp"
-        adm2_path = temp_path / "mdg_adm2.shp"
-        all_path = temp_path / "mdg_adm_ALL.shp"
-        
-        adm0.to_file(adm0_path)
-        adm1.to_file(adm1_path)
-        adm2.to_file(adm2_path)
-        all_levels.to_file(all_path)
+        # Write through pyogrio so records are batched via GDAL's C API.
+        # The writes are independent and pyogrio releases the GIL while
+        # GDAL writes, so they run concurrently (Fiona would not be thread-safe)
+        with ThreadPoolExecutor(max_workers=len(layers)) as executor:
+            list(executor.map(lambda item: item[1].to_file(temp_path / f"{item[0]}.shp", engine="pyogrio"), layers))
         
-        print(f"Saved Admin 0: {adm0_path}")
-        print(f"Saved Admin 1: {adm1_path}")
-        print(f"Saved Admin 2: {adm2_path}")
-        print(f"Saved ALL levels: {all_path}")
+        for layer_name, _ in layers:
+            print(f"Saved {layer_name}: {temp_path / f'{layer_name}.shp'}")
         
-        # Create new zip file with all four shapefiles
+        # Create new zip file with all admin level shapefiles
+        # The shapefiles are staged in the temporary directory rather than written
+        # straight into /vsizip/: GDAL cannot stream the .shp/.shx/.dbf set into a
+        # zip, and its .shp.zip support re-extracts and re-packs the whole archive
+        # for every appended layer
         print(f"\nCreating new zip file: {output_zip}")
-        with zipfile.ZipFile(output_zip, 'w', zipfile.ZIP_DEFLATED) as zip_ref:
+        # Every component is deflated: the .dbf is fixed-width, space-padded text
+        # that compresses very well, and even the .shp/.shx shrink noticeably.
+        # compresslevel=1 keeps nearly all of the size saving at a fraction of
+        # the CPU cost of the default level
+        with zipfile.ZipFile(output_zip, 'w', zipfile.ZIP_DEFLATED, compresslevel=1) as zip_ref:
             # Add all shapefile components for each admin level
-            for admin_level in ['mdg_adm0', 'mdg_adm1', 'mdg_adm2', 'mdg_adm_ALL']:
-                for ext in ['.shp', '.shx', '.dbf', '.prj', '.cpg', '.sbn', '.sbx', '.shp.xml']:
-                    file_path = temp_path / f"{admin_level}{ext}"
+            for layer_name, _ in layers:
+                # Only the components GDAL writes; it never emits the ESRI spatial
+                # index (.sbn/.sbx) or metadata (.shp.xml) sidecars
+                for ext in ['.shp', '.shx', '.dbf', '.prj', '.cpg']:
+                    file_path = temp_path / f"{layer_name}{ext}"
                     if file_path.exists():
                         zip_ref.write(file_path, file_path.name)
                         print(f"  Added: {file_path.name}")
@@ -171,5 +251,11 @@ def main():
         print(f"\nAll shapefiles are in EPSG:4326 (WGS 84 - geographic coordinate system)")
         print("Coordinates are in degrees (longitude, latitude) for web mapping compatibility")
 
+def main():
+    """
+    Main function to create the admin level shapefiles for the Python maproom.
+    """
+    build_admin_levels("SHP_ADM2_UPDATE_dante.zip", "SHP_ADM2_UPDATE.zip")
+
 if __name__ == "__main__":
     main()